@@ -1,5 +1,6 @@
 import logging
 import argparse
+from typing import List, Tuple
 from utils import Queries, ClickHouseConnection
 
 logging.basicConfig(level=logging.INFO)
@@ -17,37 +18,72 @@ class ClickHouseManager:
         """Initializes the repository with an existing ClickHouse connection."""
         self.client = connection.get_client()
         self.database = connection.database
+        self._exists_cache: set = set()
 
     def check_db_exists(self) -> bool:
         """
         Checks if the database exists.
 
+        Uses a single-row EXISTS query instead of listing the full catalog,
+        and memoizes positive answers for the lifetime of the manager.
+
         :return: True if the database exists, False otherwise.
         """
-        databases = {db[0] for db in self.client.execute(Queries.SHOW_DATABASES)}
-        return self.database in databases
+        if self.database in self._exists_cache:
+            return True
+
+        result = self.client.execute(
+            Queries.EXISTS_DATABASE, {"database": self.database}, columnar=True
+        )
+        exists = bool(result)
+        if exists:
+            self._exists_cache.add(self.database)
+        return exists
 
     def check_table_exists(self, table_name: str) -> bool:
         """
         Checks if a specific table exists in the database.
 
+        Uses a single-row EXISTS query instead of listing the full catalog,
+        and memoizes positive answers for the lifetime of the manager.
+
         :param table_name: The name of the table to check.
         :return: True if the table exists, False otherwise.
         """
-        tables = {
-            table[0]
-            for table in self.client.execute(
-                Queries.SHOW_TABLES.format(database=self.database)
-            )
-        }
-        return table_name in tables
+        key = f"{self.database}.{table_name}"
+        if key in self._exists_cache:
+            return True
+
+        result = self.client.execute(
+            Queries.EXISTS_TABLE,
+            {"database": self.database, "table": table_name},
+            columnar=True,
+        )
+        exists = bool(result)
+        if exists:
+            self._exists_cache.add(key)
+        return exists
+
+    def check_db_and_table_exist(self, table_name: str) -> Tuple[bool, bool]:
+        """
+        Checks the database and table in a single round trip.
+
+        :param table_name: The name of the table to check.
+        :return: A tuple (database exists, table exists).
+        """
+        result = self.client.execute(
+            Queries.EXISTS_DB_AND_TABLE,
+            {"database": self.database, "table": table_name},
+        )
+        db_exists, table_exists = result[0]
+        return bool(db_exists), bool(table_exists)
 
     def create_database(self) -> None:
         """
         Creates the database if it does not exist.
         """
         self.client.execute(Queries.CREATE_DATABASE.format(database=self.database))
-        logging.info(f"Database '{self.database}' created.")
+        logging.info("Database '%s' created.", self.database)
 
     def create_table(self, table_name: str, ids: str, vectors: str) -> None:
         """
@@ -60,8 +96,21 @@ class ClickHouseManager:
         self.client.execute(Queries.SET_EXPETEMENTAL)
 
         self.client.execute(
-            Queries.CREATE_TABLE.format(
-                database=self.database, table=table_name, ids=ids, vectors=vectors
+            Queries.make_create_table(self.database, table_name, ids, vectors)
+        )
+
+        # CREATE TABLE IF NOT EXISTS leaves tables from older schema
+        # versions untouched, so backfill the materialized columns the
+        # search queries rely on.
+        self.client.execute(
+            Queries.ADD_COLUMN_NORM.format(
+                database=self.database, table=table_name, vectors=vectors
+            )
+        )
+
+        self.client.execute(
+            Queries.ADD_COLUMN_I8.format(
+                database=self.database, table=table_name, vectors=vectors
             )
         )
 
@@ -77,27 +126,61 @@ class ClickHouseManager:
             )
         )
 
-        logging.info(f"Table '{table_name}' in database '{self.database}' created.")
+        logging.info("Table '%s' in database '%s' created.", table_name, self.database)
+
+    def insert_vectors(
+        self,
+        table_name: str,
+        ids: str,
+        vectors: str,
+        data: List[Tuple[str, List[float]]],
+        batch_size: int = 65536,
+    ) -> None:
+        """
+        Inserts rows in batches aligned with ClickHouse's native block size.
+
+        Sending large batches instead of row-sized ones avoids per-insert
+        overhead on both the client and the server.
+
+        :param table_name: The name of the target table.
+        :param ids: The column name for unique identifiers.
+        :param vectors: The column name for vector data.
+        :param data: A list of (document ID, vector) tuples.
+        :param batch_size: Number of rows per INSERT block.
+        """
+        query = Queries.INSERT_DATA.format(
+            database=self.database, table=table_name, ids=ids, vectors=vectors
+        )
+
+        for start in range(0, len(data), batch_size):
+            self.client.execute(query, data[start : start + batch_size])
+
+        logging.info(
+            "Inserted %d rows into '%s.%s' in batches of %d.",
+            len(data),
+            self.database,
+            table_name,
+            batch_size,
+        )
 
     def ensure_db_and_table(self, table_name: str, ids: str, vectors: str) -> None:
         """
         Ensures the database and table exist, creating them if necessary.
 
+        The CREATE and ADD INDEX statements all use IF NOT EXISTS and are
+        therefore idempotent, so they are issued unconditionally instead of
+        paying an extra SHOW DATABASES / SHOW TABLES round trip each.
+
         :param table_name: The name of the table.
         :param ids: The column name for unique identifiers.
         :param vectors: The column name for storing vector data.
         """
-        if not self.check_db_exists():
-            logging.warning(
-                f"Database '{self.database}' does not exist. Creating it..."
-            )
-            self.create_database()
+        self.create_database()
+        self.create_table(table_name, ids, vectors)
 
-        if not self.check_table_exists(table_name):
-            logging.warning(f"Table '{table_name}' does not exist. Creating it...")
-            self.create_table(table_name, ids, vectors)
-
-        logging.info(f"Database '{self.database}' and table '{table_name}' are ready.")
+        logging.info(
+            "Database '%s' and table '%s' are ready.", self.database, table_name
+        )
 
 
 def main() -> None:
@@ -137,7 +220,7 @@ def main() -> None:
 
         db.ensure_db_and_table(args.table, args.ids, args.vectors)
     except Exception as e:
-        logging.error(f"An error occurred: {e}")
+        logging.error("An error occurred: %s", e)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,14 @@ import logging
 import argparse
 import json
 import uuid
-from typing import List, Dict, Set
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 logging.basicConfig(level=logging.INFO)
@@ -15,19 +22,36 @@ class JSONSaver:
     """
 
     @staticmethod
-    def save(elements: List[Dict[str, object]], file_output: str) -> None:
+    def save(ids: List[str], vectors: np.ndarray, file_output: str) -> None:
         """
-        Saves a list of UUIDs and vectors to a JSON file.
+        Saves UUIDs and vectors to a newline-delimited JSON (NDJSON) file.
+
+        The data arrives as two parallel arrays and rows are written one
+        line at a time, so no per-row container outlives its write.
 
-        :param elements: A list of dictionaries, each containing a UUID and a vector.
+        :param ids: A list of UUID strings.
+        :param vectors: A matrix whose rows are the corresponding vectors.
         :param file_output: The file path where the JSON data should be saved.
         """
         try:
-            with open(file_output, "w") as json_file:
-                json.dump(elements, json_file, indent=4)
-            logging.info(f"Vectors have been successfully saved to '{file_output}'.")
+            with open(file_output, "wb") as json_file:
+                for id_uuid, vector in zip(ids, vectors):
+                    if orjson is not None:
+                        line = orjson.dumps(
+                            {"id": id_uuid, "vector": vector},
+                            option=orjson.OPT_SERIALIZE_NUMPY,
+                        )
+                    else:
+                        line = json.dumps(
+                            {"id": id_uuid, "vector": vector.tolist()}
+                        ).encode()
+                    json_file.write(line)
+                    json_file.write(b"\n")
+            logging.info(
+                "%d vectors have been successfully saved to '%s'.", len(ids), file_output
+            )
         except Exception as e:
-            logging.error(f"Error saving JSON file: {e}")
+            logging.error("Error saving JSON file: %s", e)
 
 
 class VectorGenerator:
@@ -51,29 +75,56 @@ class VectorGenerator:
         self.size = size
         self.count = count
 
-    def generate(self) -> List[Dict[str, object]]:
+    @staticmethod
+    def _fill_random(matrix: np.ndarray) -> None:
         """
-        Generates a list of elements, each containing a random UUID and a vector.
+        Fills the matrix with U(0, 1) float32 deviates using all CPU cores.
 
-        :return: A list of dictionaries containing UUIDs and vectors.
+        The rows are split into one chunk per worker and each chunk is
+        filled by an independently seeded generator (spawned from a single
+        SeedSequence, so the streams are uncorrelated). NumPy's RNG
+        releases the GIL, so the threads run in parallel.
+
+        :param matrix: The pre-allocated output buffer.
         """
-        existing_uuids: Set[str] = set()
-        elements: List[Dict[str, object]] = []
+        workers = min(os.cpu_count() or 1, matrix.shape[0])
+        if workers <= 1:
+            np.random.default_rng().random(out=matrix, dtype=np.float32)
+            return
+
+        seeds = np.random.SeedSequence().spawn(workers)
+        chunk = -(-matrix.shape[0] // workers)
+
+        def fill(worker: int) -> None:
+            block = matrix[worker * chunk : (worker + 1) * chunk]
+            np.random.default_rng(seeds[worker]).random(out=block, dtype=np.float32)
 
-        for _ in range(self.count):
-            while True:
-                id_uuid = str(uuid.uuid4())
-                if id_uuid not in existing_uuids:
-                    existing_uuids.add(id_uuid)
-                    break
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fill, range(workers)))
+
+    def generate(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Generates UUIDs and vectors as two parallel arrays.
+
+        The structure-of-arrays layout avoids allocating one dict per row
+        and hands consumers a matrix they can use directly.
+
+        :return: A tuple of (UUID strings, vector matrix).
+        """
+        raw = memoryview(os.urandom(16 * self.count))
+        ids: List[str] = [
+            str(uuid.UUID(bytes=raw[i * 16 : (i + 1) * 16].tobytes(), version=4))
+            for i in range(self.count)
+        ]
 
-            vector = np.random.uniform(
-                low=self.low, high=self.high, size=self.size
-            ).tolist()
-            elements.append({"id": id_uuid, "vector": vector})
+        matrix = np.empty((self.count, self.size), dtype=np.float32)
+        self._fill_random(matrix)
+        if self.low != 0.0 or self.high != 1.0:
+            matrix *= self.high - self.low
+            matrix += self.low
 
-        logging.info(f"Generated {self.count} vectors with dimension {self.size}.")
-        return elements
+        logging.info("Generated %d vectors with dimension %d.", self.count, self.size)
+        return ids, matrix
 
 
 def main() -> None:
@@ -102,9 +153,9 @@ def main() -> None:
     args = parser.parse_args()
 
     generator = VectorGenerator(args.low, args.high, args.size, args.count)
-    elements = generator.generate()
+    ids, vectors = generator.generate()
 
-    JSONSaver.save(elements, args.file_output)
+    JSONSaver.save(ids, vectors, args.file_output)
 
 
 if __name__ == "__main__":
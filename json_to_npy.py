@@ -0,0 +1,58 @@
+import logging
+import argparse
+import numpy as np
+from utils import VectorUtils
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses command-line arguments.
+
+    :return: Parsed arguments as a namespace object.
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert a JSON vector file to a binary .npy file"
+    )
+
+    parser.add_argument(
+        "--file",
+        type=str,
+        default="test.json",
+        help="Path to input JSON file with vectors",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Output .npy path (defaults to the input path with .npy)",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Converts a JSON vector file to a float32 .npy matrix once, so the
+    search scripts can memory-map it on every subsequent run instead of
+    re-parsing the JSON.
+    """
+    args = parse_arguments()
+    output = args.output or args.file.rsplit(".", 1)[0] + ".npy"
+
+    try:
+        vectors = VectorUtils.vectors_from_json(args.file)
+        np.save(output, vectors)
+        logging.info(
+            "Saved %d vectors of dimension %d to '%s'.",
+            vectors.shape[0],
+            vectors.shape[1] if vectors.ndim > 1 else 0,
+            output,
+        )
+    except Exception as e:
+        logging.error("An error occurred: %s", e)
+
+
+if __name__ == "__main__":
+    main()
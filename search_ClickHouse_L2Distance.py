@@ -23,6 +23,8 @@ class ClickHouseRepository:
         id_column: str,
         vector_column: str,
         count: int,
+        use_index: bool = False,
+        quantized: bool = False,
     ) -> Dict[int, List[Tuple[str, float]]]:
         """
         Finds the most similar vectors using the L2 (Euclidean) distance function in ClickHouse.
@@ -32,24 +34,120 @@ class ClickHouseRepository:
         :param id_column: The column name for document IDs.
         :param vector_column: The column name for vector data.
         :param count: The number of most similar vectors to retrieve.
+        :param use_index: Route each vector through the single-reference
+                          query that the HNSW skip index can serve.
+        :param quantized: Rank on the int8-quantized vector column, which
+                          reads a quarter of the bytes per row.
         :return: A dictionary where keys are indices of input vectors and values are lists of tuples with document IDs and distances.
         """
-        results_dict = {}
+        if use_index:
+            return self._search_with_index(
+                input_vectors, table, id_column, vector_column, count
+            )
+        if quantized:
+            return self._search_quantized(
+                input_vectors, table, id_column, vector_column, count
+            )
 
-        for index, input_vector in enumerate(input_vectors, start=1):
-            vector_str = "[" + ",".join(map(str, input_vector)) + "]"
+        query = Queries.SEARCH_SIMILAR_BATCH_L2Distance.format(
+            database=self.database,
+            table=table,
+            id_column=id_column,
+            vector_column=vector_column,
+        )
 
-            query = Queries.SEARCH_SIMILAR_L2Distance.format(
-                vector=vector_str,
-                database=self.database,
-                table=table,
-                id_column=id_column,
-                vector_column=vector_column,
-                count=count,
-            )
+        refs = [list(map(float, vector)) for vector in input_vectors]
+        ref_norms = [sum(value * value for value in vector) for vector in refs]
+        rows = self.client.execute(
+            query, {"refs": refs, "ref_norms": ref_norms, "count": count}
+        )
 
-            result = self.client.execute(query)
-            results_dict[index] = result
+        results_dict = {index: [] for index in range(1, len(refs) + 1)}
+        for ref_idx, doc_id, distance in rows:
+            results_dict[ref_idx].append((doc_id, distance))
+
+        return results_dict
+
+    def _search_quantized(
+        self,
+        input_vectors: List[List[float]],
+        table: str,
+        id_column: str,
+        vector_column: str,
+        count: int,
+    ) -> Dict[int, List[Tuple[str, float]]]:
+        """
+        Ranks on the materialized Array(Int8) column instead of the
+        float32 vectors.
+
+        The scan reads a quarter of the bytes per row and the distances
+        are rescaled back to the float range, at the cost of quantization
+        error in the last ranks.
+
+        :param input_vectors: A list of input vectors.
+        :param table: The name of the table.
+        :param id_column: The column name for document IDs.
+        :param vector_column: The column name for vector data.
+        :param count: The number of most similar vectors to retrieve.
+        :return: A dictionary where keys are indices of input vectors and values are lists of tuples with document IDs and distances.
+        """
+        query = Queries.SEARCH_SIMILAR_BATCH_L2_quantized.format(
+            database=self.database,
+            table=table,
+            id_column=id_column,
+            vector_column=vector_column,
+            scale=Queries.QUANT_SCALE,
+        )
+
+        refs_i8 = [
+            [int(round(max(-1.0, min(1.0, float(value))) * Queries.QUANT_SCALE))
+             for value in vector]
+            for vector in input_vectors
+        ]
+        rows = self.client.execute(query, {"refs_i8": refs_i8, "count": count})
+
+        results_dict = {index: [] for index in range(1, len(refs_i8) + 1)}
+        for ref_idx, doc_id, distance in rows:
+            results_dict[ref_idx].append((doc_id, distance))
+
+        return results_dict
+
+    def _search_with_index(
+        self,
+        input_vectors: List[List[float]],
+        table: str,
+        id_column: str,
+        vector_column: str,
+        count: int,
+    ) -> Dict[int, List[Tuple[str, float]]]:
+        """
+        Runs one single-reference query per input vector.
+
+        The vector_similarity HNSW index only serves the plain
+        ORDER BY distance LIMIT shape, so this path trades the batched
+        ARRAY JOIN scan for O(log N) graph traversals, with
+        use_skip_indexes forced on in the query template.
+
+        :param input_vectors: A list of input vectors.
+        :param table: The name of the table.
+        :param id_column: The column name for document IDs.
+        :param vector_column: The column name for vector data.
+        :param count: The number of most similar vectors to retrieve.
+        :return: A dictionary where keys are indices of input vectors and values are lists of tuples with document IDs and distances.
+        """
+        query = Queries.SEARCH_SIMILAR_L2Distance.format(
+            database=self.database,
+            table=table,
+            id_column=id_column,
+            vector_column=vector_column,
+        )
+
+        results_dict = {}
+        for index, vector in enumerate(input_vectors, start=1):
+            rows = self.client.execute(
+                query, {"ref": list(map(float, vector)), "count": count}
+            )
+            results_dict[index] = rows
 
         return results_dict
 
@@ -77,6 +175,16 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--count", type=int, default=10, help="Number of similar vectors to retrieve"
     )
+    parser.add_argument(
+        "--quantized",
+        action="store_true",
+        help="Rank on the int8-quantized vector column",
+    )
+    parser.add_argument(
+        "--use-index",
+        action="store_true",
+        help="Serve each vector through the vector_similarity HNSW index",
+    )
     parser.add_argument(
         "--file",
         type=str,
@@ -107,7 +215,13 @@ def main() -> None:
         db = ClickHouseRepository(connection)
 
         similar_vectors = db.search_similar_vectors(
-            input_vectors, args.table, args.ids, args.vectors, args.count
+            input_vectors,
+            args.table,
+            args.ids,
+            args.vectors,
+            args.count,
+            use_index=args.use_index,
+            quantized=args.quantized,
         )
 
         VectorUtils.print_similar_vectors(similar_vectors)
@@ -23,6 +23,7 @@ class ClickHouseRepository:
         id_column: str,
         vector_column: str,
         count: int,
+        use_index: bool = False,
     ) -> Dict[int, List[Tuple[str, float]]]:
         """
         Finds the most similar vectors using the L2 (Euclidean) distance function in ClickHouse.
@@ -32,24 +33,67 @@ class ClickHouseRepository:
         :param id_column: The column name for document IDs.
         :param vector_column: The column name for vector data.
         :param count: The number of most similar vectors to retrieve.
+        :param use_index: Route each vector through the single-reference
+                          query that the HNSW skip index can serve.
         :return: A dictionary where keys are indices of input vectors and values are lists of tuples with document IDs and distances.
         """
-        results_dict = {}
+        if use_index:
+            return self._search_with_index(
+                input_vectors, table, id_column, vector_column, count
+            )
 
-        for index, input_vector in enumerate(input_vectors, start=1):
-            vector_str = "[" + ",".join(map(str, input_vector)) + "]"
+        query = Queries.SEARCH_SIMILAR_BATCH_cosineDistance.format(
+            database=self.database,
+            table=table,
+            id_column=id_column,
+            vector_column=vector_column,
+        )
 
-            query = Queries.SEARCH_SIMILAR_cosineDistance.format(
-                vector=vector_str,
-                database=self.database,
-                table=table,
-                id_column=id_column,
-                vector_column=vector_column,
-                count=count,
-            )
+        refs = [list(map(float, vector)) for vector in input_vectors]
+        rows = self.client.execute(query, {"refs": refs, "count": count})
+
+        results_dict = {index: [] for index in range(1, len(refs) + 1)}
+        for ref_idx, doc_id, distance in rows:
+            results_dict[ref_idx].append((doc_id, distance))
+
+        return results_dict
+
+    def _search_with_index(
+        self,
+        input_vectors: List[List[float]],
+        table: str,
+        id_column: str,
+        vector_column: str,
+        count: int,
+    ) -> Dict[int, List[Tuple[str, float]]]:
+        """
+        Runs one single-reference query per input vector.
 
-            result = self.client.execute(query)
-            results_dict[index] = result
+        The vector_similarity HNSW index only serves the plain
+        ORDER BY distance LIMIT shape, so this path trades the batched
+        ARRAY JOIN scan for O(log N) graph traversals, with
+        use_skip_indexes forced on in the query template.
+
+        :param input_vectors: A list of input vectors.
+        :param table: The name of the table.
+        :param id_column: The column name for document IDs.
+        :param vector_column: The column name for vector data.
+        :param count: The number of most similar vectors to retrieve.
+        :return: A dictionary where keys are indices of input vectors and values are lists of tuples with document IDs and distances.
+        """
+        query = Queries.SEARCH_SIMILAR_cosineDistance.format(
+            database=self.database,
+            table=table,
+            id_column=id_column,
+            vector_column=vector_column,
+        )
+
+        results_dict = {}
+        for index, vector in enumerate(input_vectors, start=1):
+            rows = self.client.execute(
+                query, {"ref": list(map(float, vector)), "count": count}
+            )
+            results_dict[index] = rows
 
         return results_dict
 
@@ -77,6 +121,11 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--count", type=int, default=10, help="Number of similar vectors to retrieve"
     )
+    parser.add_argument(
+        "--use-index",
+        action="store_true",
+        help="Serve each vector through the vector_similarity HNSW index",
+    )
     parser.add_argument(
         "--file",
         type=str,
@@ -107,7 +156,12 @@ def main() -> None:
         db = ClickHouseRepository(connection)
 
         similar_vectors = db.search_similar_vectors(
-            input_vectors, args.table, args.ids, args.vectors, args.count
+            input_vectors,
+            args.table,
+            args.ids,
+            args.vectors,
+            args.count,
+            use_index=args.use_index,
         )
 
         VectorUtils.print_similar_vectors(similar_vectors)
@@ -1,8 +1,10 @@
+import os
+import math
 import faiss
 import logging
 import argparse
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple
 from utils import Queries, VectorUtils, ClickHouseConnection
 
 logging.basicConfig(level=logging.INFO)
@@ -20,28 +22,56 @@ class ClickHouseRepository:
 
     def get_vectors(
         self, table: str, ids: str, vectors: str
-    ) -> Optional[Dict[str, np.ndarray]]:
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Retrieves vector data from the ClickHouse database.
 
+        The row count is fetched first so the result streams straight
+        into one preallocated float32 matrix, with no per-document dict
+        or list of small arrays in between.
+
         :param table: The name of the table containing vector data.
         :param ids: The column name containing document IDs.
         :param vectors: The column name containing vector data.
-        :return: A dictionary mapping document IDs to NumPy vector arrays.
+        :return: A tuple (document IDs, vector matrix).
         """
         query = Queries.GET_VECTORS.format(
             database=self.database, table=table, ids=ids, vectors=vectors
         )
 
         try:
-            result = self.client.execute(query)
+            total = self.count_rows(table)
+            doc_ids = np.empty(total, dtype=object)
+            matrix = None
+
+            rows = self.client.execute_iter(
+                query, settings={"max_block_size": 65536}
+            )
+            for i, (doc_id, vector) in enumerate(rows):
+                if matrix is None:
+                    matrix = np.empty((total, len(vector)), dtype=np.float32)
+                doc_ids[i] = str(doc_id)
+                matrix[i] = vector
+
+            if matrix is None:
+                matrix = np.empty((0, 0), dtype=np.float32)
             logging.info("Vector data retrieved successfully.")
 
-            return {str(row[0]): np.array(row[1], dtype="float64") for row in result}
+            return doc_ids, matrix
 
         except Exception as e:
             logging.error(f"Error retrieving vector data: {e}")
-            return None
+            return np.empty(0, dtype=object), np.empty((0, 0), dtype=np.float32)
+
+    def count_rows(self, table: str) -> int:
+        """
+        Returns the number of rows in a table.
+
+        :param table: The name of the table containing vector data.
+        :return: The current row count.
+        """
+        query = Queries.COUNT_ROWS.format(database=self.database, table=table)
+        return self.client.execute(query)[0][0]
 
 
 class VectorSearcher:
@@ -49,28 +79,70 @@ class VectorSearcher:
     A class for performing similarity searches using FAISS.
     """
 
-    def __init__(self, vectors_index: Dict[str, np.ndarray], nlist: int):
+    def __init__(
+        self,
+        doc_ids: np.ndarray,
+        db_vectors: np.ndarray,
+        nlist: int,
+        nprobe: int = 0,
+        index_type: str = "ivfflat",
+        pq_m: int = 16,
+        pq_nbits: int = 8,
+        use_gpu: bool = False,
+    ):
         """
         Initializes the FAISS index.
 
-        :param vectors_index: A dictionary where keys are document IDs and values are vectors.
+        :param doc_ids: An array of document IDs, parallel to the matrix rows.
+        :param db_vectors: A contiguous float32 matrix of stored vectors.
         :param nlist: Number of clusters to use in the IVF index.
+        :param nprobe: Number of clusters to visit per query; defaults to
+                       sqrt(nlist), the usual recall/speed compromise.
+        :param index_type: "ivfflat" stores full float32 vectors per list;
+                           "ivfpq" compresses each vector to pq_m bytes, so
+                           the list scan reads a fraction of the memory.
+        :param pq_m: Number of product-quantizer sub-vectors; must divide
+                     the vector dimension.
+        :param pq_nbits: Bits per sub-quantizer code.
+        :param use_gpu: Move the index to the first CUDA device when the
+                        faiss-gpu build is available.
         """
-        if not vectors_index:
+        if db_vectors.size == 0:
             raise ValueError("Vector index is empty.")
 
-        self.doc_ids = np.array(list(vectors_index.keys()))
-        self.db_vectors = np.array(list(vectors_index.values()), dtype="float64")
+        faiss.omp_set_num_threads(os.cpu_count())
+
+        self.doc_ids = doc_ids
+        self.db_vectors = db_vectors
 
         d = self.db_vectors.shape[1]
         quantizer = faiss.IndexFlatL2(d)
-        self.index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_L2)
+        if index_type == "ivfpq":
+            if d % pq_m != 0:
+                raise ValueError(f"pq_m={pq_m} must divide the dimension {d}.")
+            self.index = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, pq_nbits)
+        elif index_type == "ivfflat":
+            self.index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_L2)
+        else:
+            raise ValueError(f"Unknown index type: {index_type!r}")
 
         self.index.train(self.db_vectors)
 
         self.index.add(self.db_vectors)
 
-        self.index.nprobe = nlist
+        # Probing every list would degrade the index to an exhaustive scan
+        # with extra coarse-quantizer overhead on top.
+        self.index.nprobe = nprobe if nprobe > 0 else max(1, int(math.sqrt(nlist)))
+
+        if use_gpu:
+            try:
+                resources = faiss.StandardGpuResources()
+                self.index = faiss.index_cpu_to_gpu(resources, 0, self.index)
+                logging.info("FAISS index moved to GPU 0.")
+            except AttributeError:
+                logging.warning(
+                    "faiss-gpu is not installed; continuing on the CPU."
+                )
 
     def search_similar(
         self, input_vectors: List[List[float]], count: int
@@ -82,20 +154,19 @@ class VectorSearcher:
         :param count: The number of similar vectors to return.
         :return: A dictionary mapping input vector indices to lists of tuples (document ID, distance).
         """
-        similar_vectors: Dict[int, List[Tuple[str, float]]] = {}
-
-        for idx, input_vector in enumerate(input_vectors):
-            input_vector_np = np.array(input_vector, dtype="float64").reshape(1, -1)
+        queries = np.ascontiguousarray(np.asarray(input_vectors, dtype=np.float32))
 
-            distances, indices = self.index.search(input_vector_np, count)
+        # One batched call lets FAISS spread the queries across its OpenMP
+        # threads and use its BLAS bulk path, instead of paying the per-call
+        # setup once per vector.
+        distances, indices = self.index.search(queries, count)
 
-            distances = np.sqrt(distances)
+        np.sqrt(distances, out=distances)
 
-            similar_vectors[idx] = [
-                (self.doc_ids[indices[0][i]], distances[0][i]) for i in range(count)
-            ]
-
-        return similar_vectors
+        return {
+            idx: list(zip(self.doc_ids[indices[idx]].tolist(), distances[idx].tolist()))
+            for idx in range(queries.shape[0])
+        }
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -130,6 +201,29 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--nlist", type=int, default=100, help="Number of clusters for IVF index"
     )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=0,
+        help="Clusters to probe per query (0 = sqrt(nlist))",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=["ivfflat", "ivfpq"],
+        default="ivfflat",
+        help="IVF list storage: full float32 vectors or PQ codes",
+    )
+    parser.add_argument(
+        "--pq-m", type=int, default=16, help="PQ sub-vectors (must divide dimension)"
+    )
+    parser.add_argument(
+        "--pq-nbits", type=int, default=8, help="Bits per PQ sub-quantizer code"
+    )
+    parser.add_argument(
+        "--gpu",
+        action="store_true",
+        help="Run the search on the first CUDA device (requires faiss-gpu)",
+    )
     return parser.parse_args()
 
 
@@ -153,9 +247,18 @@ def main() -> None:
 
         db = ClickHouseRepository(connection)
 
-        vectors_db = db.get_vectors(args.table, args.ids, args.vectors)
-
-        searcher = VectorSearcher(vectors_db, nlist=args.nlist)
+        doc_ids, db_vectors = db.get_vectors(args.table, args.ids, args.vectors)
+
+        searcher = VectorSearcher(
+            doc_ids,
+            db_vectors,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            index_type=args.index_type,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+            use_gpu=args.gpu,
+        )
         similar_vectors = searcher.search_similar(input_vectors, args.count)
 
         VectorUtils.print_similar_vectors(similar_vectors)
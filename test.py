@@ -1,5 +1,6 @@
 import time
 import logging
+import multiprocessing
 from typing import Callable, Tuple
 from memory_profiler import memory_usage
 from search_Euclidean_Distance import main as method1
@@ -15,89 +16,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+METHODS = [
+    ("Method 1", method1),
+    ("Method 2", method2),
+    ("Method 3", method3),
+    ("Method 4", method4),
+    ("Method 5", method5),
+]
+
 
 def measure_memory_and_time(method: Callable[[], None]) -> Tuple[float, float]:
     """
     Function to measure the execution time and peak memory usage of a given method.
 
+    The method runs in its own process and the peak RSS is sampled on that
+    child, so heap growth left behind by one method (caches, allocator
+    arenas, JIT code) cannot inflate the readings of the methods that run
+    after it.
+
     :param method: The method whose time and memory usage are to be measured.
     :return: A tuple containing the execution time in seconds and the peak memory usage in megabytes.
     """
-    start_time = time.time()
-
-    mem_usage = memory_usage((method,), max_usage=True)
+    process = multiprocessing.Process(target=method)
 
+    start_time = time.time()
+    process.start()
+
+    # memory_usage on an external pid takes a single sample when no
+    # timeout is given, so poll in short windows until the child exits
+    # and keep the maximum across them.
+    peak = 0.0
+    while process.is_alive():
+        peak = max(
+            peak,
+            memory_usage(
+                process.pid, timeout=0.1, max_usage=True, include_children=True
+            ),
+        )
+
+    process.join()
     end_time = time.time()
 
-    return end_time - start_time, mem_usage
+    if process.exitcode != 0:
+        raise RuntimeError(
+            f"Method subprocess exited with code {process.exitcode}"
+        )
+    if peak == 0.0:
+        raise RuntimeError(
+            "Method subprocess exited before any memory sample was taken"
+        )
+
+    return end_time - start_time, peak
 
 
 if __name__ == "__main__":
 
     n_runs = int(input("Enter the number of runs: "))
 
-    times_method1 = []
-    mems_method1 = []
-
-    times_method2 = []
-    mems_method2 = []
-
-    times_method3 = []
-    mems_method3 = []
-
-    times_method4 = []
-    mems_method4 = []
-
-    times_method5 = []
-    mems_method5 = []
+    times = {name: [] for name, _ in METHODS}
+    mems = {name: [] for name, _ in METHODS}
 
     for _ in range(n_runs):
-        time1, mem1 = measure_memory_and_time(method1)
-        times_method1.append(time1)
-        mems_method1.append(mem1)
-
-        time2, mem2 = measure_memory_and_time(method2)
-        times_method2.append(time2)
-        mems_method2.append(mem2)
-
-        time3, mem3 = measure_memory_and_time(method3)
-        times_method3.append(time3)
-        mems_method3.append(mem3)
-
-        time4, mem4 = measure_memory_and_time(method4)
-        times_method4.append(time4)
-        mems_method4.append(mem4)
-
-        time5, mem5 = measure_memory_and_time(method5)
-        times_method5.append(time5)
-        mems_method5.append(mem5)
-
-    avg_time1 = sum(times_method1) / len(times_method1)
-    avg_mem1 = sum(mems_method1) / len(mems_method1)
-
-    avg_time2 = sum(times_method2) / len(times_method2)
-    avg_mem2 = sum(mems_method2) / len(mems_method2)
-
-    avg_time3 = sum(times_method3) / len(times_method3)
-    avg_mem3 = sum(mems_method3) / len(mems_method3)
-
-    avg_time4 = sum(times_method4) / len(times_method4)
-    avg_mem4 = sum(mems_method4) / len(mems_method4)
-
-    avg_time5 = sum(times_method5) / len(times_method5)
-    avg_mem5 = sum(mems_method5) / len(mems_method5)
-
-    logger.info(f"Average execution time for Method 1: {avg_time1:.4f} seconds")
-    logger.info(f"Average peak memory usage for Method 1: {avg_mem1:.2f} MiB\n")
-
-    logger.info(f"Average execution time for Method 2: {avg_time2:.4f} seconds")
-    logger.info(f"Average peak memory usage for Method 2: {avg_mem2:.2f} MiB\n")
-
-    logger.info(f"Average execution time for Method 3: {avg_time3:.4f} seconds")
-    logger.info(f"Average peak memory usage for Method 3: {avg_mem3:.2f} MiB\n")
+        for name, method in METHODS:
+            elapsed, mem = measure_memory_and_time(method)
+            times[name].append(elapsed)
+            mems[name].append(mem)
 
-    logger.info(f"Average execution time for Method 4: {avg_time4:.4f} seconds")
-    logger.info(f"Average peak memory usage for Method 4: {avg_mem4:.2f} MiB\n")
+    for name, _ in METHODS:
+        avg_time = sum(times[name]) / len(times[name])
+        avg_mem = sum(mems[name]) / len(mems[name])
 
-    logger.info(f"Average execution time for Method 5: {avg_time5:.4f} seconds")
-    logger.info(f"Average peak memory usage for Method 5: {avg_mem5:.2f} MiB\n")
+        logger.info(f"Average execution time for {name}: {avg_time:.4f} seconds")
+        logger.info(f"Average peak memory usage for {name}: {avg_mem:.2f} MiB\n")
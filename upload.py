@@ -2,11 +2,38 @@ import logging
 import argparse
 import os
 import json
-from typing import List, Tuple
+import mmap
+import queue
+import operator
+import threading
+import numpy as np
+from typing import Iterator, List, Tuple
 from clickhouse_driver import errors
 from utils import Queries, ClickHouseConnection
 
-logging.basicConfig(level=logging.INFO)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # The C backend parses roughly an order of magnitude faster than
+    # ijson's pure-Python fallback.
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+#: Exceptions raised for malformed input by any of the parser branches;
+#: ijson signals errors through its own hierarchy rather than ValueError.
+if ijson is not None:
+    from ijson.common import JSONError
+
+    PARSE_ERRORS = (ValueError, KeyError, JSONError)
+else:
+    PARSE_ERRORS = (ValueError, KeyError)
 
 
 class FileLoader:
@@ -14,38 +41,103 @@ class FileLoader:
     A utility class for loading vector data from a JSON file.
     """
 
+    #: Rows per yielded batch; bounds peak memory to one batch of ids
+    #: plus one float32 matrix regardless of input file size.
+    BATCH_SIZE = 50000
+
+    #: Array files smaller than this are parsed in one orjson call, which
+    #: beats event-by-event streaming when the payload fits in RAM anyway.
+    STREAMING_THRESHOLD = 256 << 20
+
     @staticmethod
-    def load(file_input: str) -> List[Tuple[str, List[float]]]:
+    def _pack(rows: List[List[float]]) -> np.ndarray:
+        """
+        Packs a batch of vectors into one float32 matrix.
+
+        :param rows: The vectors of the current batch.
+        :return: A matrix whose rows are the given vectors.
         """
-        Loads vector data from a JSON file.
+        size = len(rows[0])
+        return np.fromiter(
+            (value for row in rows for value in row),
+            dtype=np.float32,
+            count=len(rows) * size,
+        ).reshape(len(rows), size)
+
+    @classmethod
+    def iter_batches(
+        cls, file_input: str, batch_size: int = 0
+    ) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """
+        Streams vector data from a JSON file in bounded batches.
+
+        Newline-delimited files are read line by line. JSON arrays up to
+        STREAMING_THRESHOLD are parsed in one orjson/json call, larger
+        ones are streamed with ijson when it is installed. The file is
+        memory-mapped so the parser reads straight from the page cache,
+        and the caller only ever holds one batch of ids and one packed
+        float32 matrix at a time.
 
         :param file_input: Path to the input JSON file.
-        :return: A list of tuples containing document IDs and vectors.
+        :param batch_size: Rows per batch; defaults to BATCH_SIZE.
+        :return: An iterator of (document IDs, vector matrix) batches.
         """
-        data_to_load: List[Tuple[str, List[float]]] = []
+        try:
+            stat = os.stat(file_input)
+        except FileNotFoundError:
+            logging.error("File '%s' does not exist.", file_input)
+            return
 
-        if not os.path.exists(file_input):
-            logging.error(f"File '{file_input}' does not exist.")
-            return data_to_load
+        if stat.st_size == 0:
+            logging.error("File '%s' is empty.", file_input)
+            return
 
-        if os.path.getsize(file_input) == 0:
-            logging.error(f"File '{file_input}' is empty.")
-            return data_to_load
+        batch_size = batch_size or cls.BATCH_SIZE
+        loads = json.loads if orjson is None else orjson.loads
 
         try:
-            with open(file_input, "r") as file:
-                elements = json.load(file)
+            with open(file_input, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as buffer:
+                if buffer[:16].lstrip().startswith(b"["):
+                    small = len(buffer) < cls.STREAMING_THRESHOLD
+                    if small or ijson is None:
+                        if orjson is not None:
+                            elements = orjson.loads(memoryview(buffer))
+                        else:
+                            elements = json.loads(buffer[:])
+                    else:
+                        elements = ijson.items(buffer, "item", use_float=True)
+                else:
+                    elements = (
+                        loads(line)
+                        for line in iter(buffer.readline, b"")
+                        if line.strip()
+                    )
+
+                # itemgetter extracts both fields in one C call instead of
+                # two dict probes per row.
+                getter = operator.itemgetter("id", "vector")
 
-            for element in elements:
-                doc_id = element["id"]
-                centroid = element["vector"]
-                data_to_load.append((doc_id, centroid))
+                ids: List[str] = []
+                rows: List[List[float]] = []
+                total = 0
+                for element in elements:
+                    doc_id, vector = getter(element)
+                    ids.append(doc_id)
+                    rows.append(vector)
+                    if len(ids) >= batch_size:
+                        total += len(ids)
+                        yield ids, cls._pack(rows)
+                        ids, rows = [], []
 
-            logging.info(f"Loaded {len(data_to_load)} records from '{file_input}'.")
-        except (json.JSONDecodeError, KeyError) as e:
-            logging.error(f"Error reading JSON file '{file_input}': {e}")
+                if ids:
+                    total += len(ids)
+                    yield ids, cls._pack(rows)
 
-        return data_to_load
+            logging.info("Loaded %d records from '%s'.", total, file_input)
+        except PARSE_ERRORS as e:
+            logging.error("Error reading JSON file '%s': %s", file_input, e)
 
 
 class DatabaseUploader:
@@ -55,38 +147,100 @@ class DatabaseUploader:
 
     def __init__(self, connection: ClickHouseConnection):
         """Initializes the repository with an existing ClickHouse connection."""
+        self._connection = connection
         self.client = connection.get_client()
         self.database = connection.database
 
+    #: Batches buffered between the parsing thread and the insert loop;
+    #: memory stays bounded at this many batches.
+    QUEUE_DEPTH = 4
+
     def insert_data(
         self,
         database: str,
         table: str,
         ids: str,
         vectors: str,
-        data: List[Tuple[str, List[float]]],
+        batches: Iterator[Tuple[List[str], np.ndarray]],
+        workers: int = 1,
     ) -> None:
         """
-        Inserts data into the specified ClickHouse table.
+        Inserts streamed batches into the specified ClickHouse table.
+
+        The batch iterator is drained on a producer thread feeding a
+        bounded queue while consumer threads send the blocks, so JSON
+        parsing overlaps the network round-trips instead of alternating
+        with them. With workers > 1 each consumer inserts over its own
+        connection, since one Client serializes all blocks on a single
+        socket; MergeTree absorbs concurrent inserts of large blocks
+        well.
 
         :param database: Database name.
         :param table: Table name.
-        :param data: List of tuples containing document IDs and vector data.
+        :param batches: An iterator of (document IDs, vector matrix) batches.
+        :param workers: Number of concurrent insert connections.
         """
-        if not data:
-            logging.error("No data to insert.")
-            return
+        query = Queries.INSERT_DATA.format(
+            database=database, table=table, ids=ids, vectors=vectors
+        )
 
-        try:
-            query = Queries.INSERT_DATA.format(
-                database=database, table=table, ids=ids, vectors=vectors
-            )
-            self.client.execute(query, data)
+        clients = [self.client]
+        if workers > 1:
+            clients += [self._connection.new_client() for _ in range(workers - 1)]
+
+        handoff: queue.Queue = queue.Queue(maxsize=self.QUEUE_DEPTH)
+
+        def produce() -> None:
+            try:
+                for batch in batches:
+                    handoff.put(batch)
+            finally:
+                for _ in clients:
+                    handoff.put(None)
+
+        totals = [0] * len(clients)
+
+        def consume(worker: int) -> None:
+            client = clients[worker]
+            while True:
+                batch = handoff.get()
+                if batch is None:
+                    return
+                doc_ids, matrix = batch
+                try:
+                    client.execute(query, [doc_ids, matrix.tolist()], columnar=True)
+                    totals[worker] += len(doc_ids)
+                except errors.Error as e:
+                    logging.error("Error inserting data into ClickHouse: %s", e)
+                except Exception as e:
+                    # The consumer must keep draining the queue even on
+                    # unexpected failures; a dead consumer would leave the
+                    # producer blocked on a full queue forever.
+                    logging.error("Unexpected error during insert: %s", e)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        consumers = [
+            threading.Thread(target=consume, args=(worker,))
+            for worker in range(len(clients))
+        ]
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+        producer.join()
+
+        total = sum(totals)
+        if total:
             logging.info(
-                f"Successfully inserted {len(data)} records into '{database}.{table}'."
+                "Successfully inserted %d records into '%s.%s'.",
+                total,
+                database,
+                table,
             )
-        except errors.ServerException as e:
-            logging.error(f"Error inserting data into ClickHouse: {e}")
+        else:
+            logging.error("No data to insert.")
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -108,6 +262,12 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--file_input", type=str, default="elements.json", help="Path to the JSON file"
     )
+    parser.add_argument(
+        "--insert-workers",
+        type=int,
+        default=1,
+        help="Concurrent insert connections (raise for very large files)",
+    )
 
     return parser.parse_args()
 
@@ -116,6 +276,8 @@ def main() -> None:
     """
     Main function that handles database connection, file processing, and data insertion.
     """
+    logging.basicConfig(level=logging.INFO)
+
     args = parse_arguments()
 
     try:
@@ -129,12 +291,17 @@ def main() -> None:
 
         db = DatabaseUploader(connection)
 
-        data = FileLoader.load(args.file_input)
-        if data:
-            db.insert_data(args.database, args.table, args.ids, args.vectors, data)
+        db.insert_data(
+            args.database,
+            args.table,
+            args.ids,
+            args.vectors,
+            FileLoader.iter_batches(args.file_input),
+            workers=args.insert_workers,
+        )
 
     except Exception as e:
-        logging.error(f"An error occurred: {e}")
+        logging.error("An error occurred: %s", e)
 
 
 if __name__ == "__main__":
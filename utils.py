@@ -1,8 +1,20 @@
+import re
 import json
+import atexit
+import socket
 import logging
+import functools
+import threading
+import os
+import numpy as np
 from clickhouse_driver import Client
 from typing import List, Dict, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class Queries:
     """
@@ -15,62 +27,257 @@ class Queries:
             CREATE TABLE IF NOT EXISTS {database}.{table}
             (
                 {ids} UUID,
-                {vectors} Array(Float64)
+                {vectors} Array(Float32),
+                {vectors}_norm Float32 MATERIALIZED dotProduct({vectors}, {vectors}),
+                {vectors}_i8 Array(Int8) MATERIALIZED arrayMap(
+                    v -> toInt8(round(greatest(least(v, 1.0), -1.0) * 127)),
+                    {vectors}
+                )
             )
             ENGINE = MergeTree()
             ORDER BY {ids}
         """
+    ADD_COLUMN_NORM = """
+            ALTER TABLE {database}.{table}
+            ADD COLUMN IF NOT EXISTS {vectors}_norm Float32
+            MATERIALIZED dotProduct({vectors}, {vectors})
+        """
+    ADD_COLUMN_I8 = """
+            ALTER TABLE {database}.{table}
+            ADD COLUMN IF NOT EXISTS {vectors}_i8 Array(Int8)
+            MATERIALIZED arrayMap(
+                v -> toInt8(round(greatest(least(v, 1.0), -1.0) * 127)),
+                {vectors}
+            )
+        """
     ADD_INDEX_L2 = """
-            ALTER TABLE {database}.{table} 
-            ADD INDEX idx_l2 {vectors} 
-            TYPE vector_similarity('hnsw', 'L2Distance') 
-            GRANULARITY 1
+            ALTER TABLE {database}.{table}
+            ADD INDEX IF NOT EXISTS idx_l2 {vectors}
+            TYPE vector_similarity('hnsw', 'L2Distance')
+            GRANULARITY 100
         """
     ADD_INDEX_cosine = """
-            ALTER TABLE {database}.{table} 
-            ADD INDEX idx_cosine {vectors} 
-            TYPE vector_similarity('hnsw', 'cosineDistance') 
-            GRANULARITY 1
+            ALTER TABLE {database}.{table}
+            ADD INDEX IF NOT EXISTS idx_cosine {vectors}
+            TYPE vector_similarity('hnsw', 'cosineDistance')
+            GRANULARITY 100
         """
 
     SHOW_DATABASES = "SHOW DATABASES"
     SHOW_TABLES = "SHOW TABLES FROM {database}"
 
+    EXISTS_DATABASE = (
+        "SELECT 1 FROM system.databases WHERE name = %(database)s LIMIT 1"
+    )
+    EXISTS_TABLE = (
+        "SELECT 1 FROM system.tables "
+        "WHERE database = %(database)s AND name = %(table)s LIMIT 1"
+    )
+    EXISTS_DB_AND_TABLE = (
+        "SELECT "
+        "(SELECT count() FROM system.databases WHERE name = %(database)s), "
+        "(SELECT count() FROM system.tables "
+        "WHERE database = %(database)s AND name = %(table)s)"
+    )
+
     INSERT_DATA = "INSERT INTO {database}.{table} ({ids}, {vectors}) VALUES"
     SELECT_ALL = "SELECT * FROM {database}.{table}"
     CHECK_TABLE = "SHOW CREATE TABLE {database}.{table}"
 
     GET_VECTORS = "SELECT {ids}, {vectors} FROM {database}.{table}"
+    COUNT_ROWS = "SELECT count() FROM {database}.{table}"
 
     SEARCH_SIMILAR_L2Distance = """
-            WITH {vector} AS reference_vector
+            WITH %(ref)s AS reference_vector
             SELECT {id_column}, L2Distance({vector_column}, reference_vector) AS distance
             FROM {database}.{table}
             ORDER BY distance
-            LIMIT {count}
+            LIMIT %(count)s
+            SETTINGS use_skip_indexes = 1
         """
 
     SEARCH_SIMILAR_cosineDistance = """
-            WITH {vector} AS reference_vector
+            WITH %(ref)s AS reference_vector
             SELECT {id_column}, cosineDistance({vector_column}, reference_vector) AS distance
             FROM {database}.{table}
             ORDER BY distance
-            LIMIT {count}
+            LIMIT %(count)s
+            SETTINGS use_skip_indexes = 1
+        """
+
+    SEARCH_SIMILAR_BATCH_L2Distance = """
+            WITH %(refs)s AS reference_vectors, %(ref_norms)s AS reference_norms
+            SELECT ref_idx, {id_column},
+                   sqrt(greatest(
+                       {vector_column}_norm + reference_norms[ref_idx]
+                       - 2 * dotProduct({vector_column}, reference_vectors[ref_idx]),
+                       0
+                   )) AS distance
+            FROM {database}.{table}
+            ARRAY JOIN arrayEnumerate(reference_vectors) AS ref_idx
+            ORDER BY ref_idx, distance
+            LIMIT %(count)s BY ref_idx
+        """
+
+    #: Symmetric int8 quantization scale; maps the generator's unit-range
+    #: values onto the full Int8 range.
+    QUANT_SCALE = 127.0
+
+    SEARCH_SIMILAR_BATCH_L2_quantized = """
+            WITH %(refs_i8)s AS reference_vectors
+            SELECT ref_idx, {id_column},
+                   sqrt(L2SquaredDistance(
+                       {vector_column}_i8, reference_vectors[ref_idx]
+                   )) / {scale} AS distance
+            FROM {database}.{table}
+            ARRAY JOIN arrayEnumerate(reference_vectors) AS ref_idx
+            ORDER BY ref_idx, distance
+            LIMIT %(count)s BY ref_idx
+        """
+
+    SEARCH_SIMILAR_BATCH_cosineDistance = """
+            WITH %(refs)s AS reference_vectors
+            SELECT ref_idx, {id_column},
+                   cosineDistance({vector_column}, reference_vectors[ref_idx]) AS distance
+            FROM {database}.{table}
+            ARRAY JOIN arrayEnumerate(reference_vectors) AS ref_idx
+            ORDER BY ref_idx, distance
+            LIMIT %(count)s BY ref_idx
+        """
+
+    _IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    @classmethod
+    def validate_identifier(cls, name: str) -> str:
+        """
+        Ensures a value used as a database/table/column identifier is safe
+        to interpolate into a query template.
+
+        :param name: The identifier to validate.
+        :return: The identifier unchanged.
+        :raises ValueError: If the identifier contains unexpected characters.
+        """
+        if not cls._IDENTIFIER_RE.match(name):
+            raise ValueError(f"Invalid ClickHouse identifier: {name!r}")
+        return name
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def make_create_table(cls, database: str, table: str, ids: str, vectors: str) -> str:
+        """
+        Builds the CREATE TABLE statement for a given schema once and caches
+        it, validating all identifiers in one place.
+
+        :param database: Database name.
+        :param table: Table name.
+        :param ids: The column name for unique identifiers.
+        :param vectors: The column name for vector data.
+        :return: The formatted CREATE TABLE statement.
         """
+        for name in (database, table, ids, vectors):
+            cls.validate_identifier(name)
+
+        return cls.CREATE_TABLE.format(
+            database=database, table=table, ids=ids, vectors=vectors
+        )
 
 
 class ClickHouseConnection:
     """
     A class for managing ClickHouse connection.
+
+    Clients are cached per (host, port, user, database) at module level, so
+    repeated instantiations within one process reuse the same TCP connection
+    instead of paying the handshake and authentication again.
     """
 
+    _clients: Dict[Tuple[str, int, str, str], Client] = {}
+    _clients_lock = threading.Lock()
+
+    #: Settings applied to every client: read parallelism plus insert
+    #: block sizing, so bulk loads hand the server full-size blocks that
+    #: become few large MergeTree parts instead of many small ones.
+    CLIENT_SETTINGS = {
+        "max_threads": os.cpu_count(),
+        "max_insert_threads": 8,
+        "insert_block_size": 1 << 20,
+        "min_insert_block_size_rows": 1 << 20,
+        "min_insert_block_size_bytes": 256 << 20,
+    }
+
     def __init__(self, host: str, port: int, user: str, password: str, database: str):
-        self.client = Client(host=host, port=port, user=user, password=password)
+        self._params = (host, port, user, password)
+        key = (host, port, user, database)
+
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = Client(
+                    host=host,
+                    port=port,
+                    user=user,
+                    password=password,
+                    compression="lz4",
+                    settings=dict(self.CLIENT_SETTINGS),
+                )
+                self._clients[key] = client
+                atexit.register(client.disconnect)
+
+        self.client = client
         self.database = database
+        self._tune_socket()
+
+    #: Socket buffer size for bulk vector transfers; large enough to keep a
+    #: high bandwidth-delay-product link busy.
+    SOCKET_BUFFER_SIZE = 4 * 1024 * 1024
+
+    def _tune_socket(self) -> None:
+        """
+        Tunes the driver socket for this workload: TCP_NODELAY so small
+        query frames (DDL, SHOW statements) go out immediately, enlarged
+        send/receive buffers for bulk vector inserts and selects, and
+        SO_KEEPALIVE so idle pooled connections are not dropped silently.
+        """
+        try:
+            self.client.connection.force_connect()
+            sock = self.client.connection.socket
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, self.SOCKET_BUFFER_SIZE
+            )
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, self.SOCKET_BUFFER_SIZE
+            )
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except Exception as e:
+            logging.warning("Could not tune the connection socket: %s", e)
 
     def get_client(self) -> Client:
         return self.client
 
+    def new_client(self) -> Client:
+        """
+        Builds a dedicated client with this connection's parameters,
+        bypassing the shared pool.
+
+        A single Client serializes all queries over one socket, so code
+        that wants several concurrent requests needs one client per
+        thread.
+
+        :return: A freshly connected client.
+        """
+        host, port, user, password = self._params
+        client = Client(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            compression="lz4",
+            settings=dict(self.CLIENT_SETTINGS),
+        )
+        atexit.register(client.disconnect)
+        return client
+
 
 class VectorUtils:
     """
@@ -87,20 +294,51 @@ class VectorUtils:
         :param similar_vectors: A dictionary where keys are input vector indices
                                 and values are lists of tuples (document ID, distance).
         """
+        lines = []
         for index, result in similar_vectors.items():
-            logging.warning(f"Results for the {index}th input vector:")
+            lines.append(f"Results for the {index}th input vector:")
             for doc_id, distance in result:
-                logging.warning(f"ID: {doc_id}, Distance: {distance}")
+                lines.append(f"ID: {doc_id}, Distance: {distance}")
+
+        if lines:
+            logging.warning("\n".join(lines))
 
     @staticmethod
-    def vectors_from_json(file_path: str) -> List[List[float]]:
+    def vectors_from_json(file_path: str) -> np.ndarray:
         """
-        Loads input vectors from a JSON file.
+        Loads input vectors from a JSON file into a float32 matrix.
 
-        :param file_path: Path to the JSON file.
-        :return: A list of vectors.
+        Accepts both a JSON array of elements and newline-delimited JSON
+        (one element per line), as produced by generation.py. The vectors
+        are packed straight into one NumPy matrix so callers do not pay
+        for an intermediate list of Python lists.
+
+        A path ending in .npy (as written by json_to_npy.py) is
+        memory-mapped instead of parsed, so repeated runs share the same
+        page-cache-resident matrix with no JSON work at all.
+
+        :param file_path: Path to the JSON or .npy file.
+        :return: A matrix whose rows are the input vectors.
         """
-        with open(file_path, "r") as f:
-            data = json.load(f)
+        if file_path.endswith(".npy"):
+            return np.load(file_path, mmap_mode="r")
+
+        with open(file_path, "rb") as f:
+            content = f.read()
+
+        loads = json.loads if orjson is None else orjson.loads
+
+        if content.lstrip().startswith(b"["):
+            data = loads(content)
+        else:
+            data = [loads(line) for line in content.splitlines() if line.strip()]
+
+        if not data:
+            return np.empty((0, 0), dtype=np.float32)
 
-        return [item["vector"] for item in data]
+        size = len(data[0]["vector"])
+        return np.fromiter(
+            (value for item in data for value in item["vector"]),
+            dtype=np.float32,
+            count=len(data) * size,
+        ).reshape(len(data), size)